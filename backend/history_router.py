@@ -1,4 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import codecs
+import hashlib
+import itertools
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session, joinedload
 
 import models
@@ -8,6 +17,15 @@ import models_db
 
 router = APIRouter()
 
+# Rows fetched per round trip from the server-side cursor during export
+EXPORT_BATCH_SIZE = 1000
+# Records buffered before a bulk insert during import
+IMPORT_BATCH_SIZE = 1000
+# Bytes read from the uploaded file at a time during import
+IMPORT_CHUNK_SIZE = 64 * 1024
+# Largest single record (characters) buffered while parsing an import
+IMPORT_MAX_RECORD_SIZE = 1024 * 1024
+
 @router.get("/history", response_model=models.HistoryResponse)
 async def history(email: str = Depends(auth.get_email_from_token), db: Session = Depends(database.get_db)):
     # Get user
@@ -110,3 +128,358 @@ async def rename_summary(
     db.commit()
 
     return {"message": "Title updated"}
+
+@router.get("/history/export")
+async def export_history(email: str = Depends(auth.get_email_from_token), db: Session = Depends(database.get_db)):
+    # Get user
+    db_user = db.query(models_db.User).filter(models_db.User.email == email).first()
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    return StreamingResponse(
+        _export_lines(db_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="history.ndjson"'}
+    )
+
+@router.post("/history/import")
+def import_history(
+    file: UploadFile = File(...),
+    email: str = Depends(auth.get_email_from_token),
+    db: Session = Depends(database.get_db)
+):
+    # Get user
+    db_user = db.query(models_db.User).filter(models_db.User.email == email).first()
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    importer = _HistoryImporter(db, db_user.id)
+    try:
+        for kind, record in _iter_import_records(file.file):
+            if kind == "chat":
+                importer.add_chat(record)
+            else:
+                importer.add_message(record)
+        importer.flush()
+        db.commit()
+    except (ValueError, KeyError, TypeError, RecursionError) as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid import file: {str(e)}"
+        )
+    except DBAPIError:
+        # e.g. a concurrent import inserted the same chat_id first
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import conflicted with existing history, please retry"
+        )
+
+    return {
+        "message": "History imported",
+        "chats_imported": importer.chats_imported,
+        "chats_skipped": importer.chats_skipped,
+        "messages_imported": importer.messages_imported,
+        "messages_skipped": importer.messages_skipped
+    }
+
+def _export_lines(user_id: int):
+    """
+    Yield the user's chats and messages as NDJSON, one chunk per fetched batch.
+
+    Each chat is written as a "chat" record followed by its "message" records.
+    Uses its own session so the cursor stays open for the whole response.
+    """
+    stmt = select(
+        models_db.Chat.id.label("chat_pk"),
+        models_db.Chat.chat_id,
+        models_db.Chat.title,
+        models_db.Chat.timestamp.label("chat_timestamp"),
+        models_db.Message.type,
+        models_db.Message.content,
+        models_db.Message.url,
+        models_db.Message.timestamp.label("message_timestamp")
+    ).outerjoin(
+        models_db.Message, models_db.Message.chat_id == models_db.Chat.id
+    ).where(
+        models_db.Chat.user_id == user_id
+    ).order_by(
+        models_db.Chat.timestamp.desc(),
+        models_db.Chat.id,
+        models_db.Message.timestamp,
+        models_db.Message.id
+    )
+
+    with database.SessionLocal() as db:
+        # yield_per implies stream_results, i.e. a server-side cursor on PostgreSQL
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        current_chat = None
+        for rows in result.partitions():
+            lines = []
+            for row in rows:
+                if row.chat_pk != current_chat:
+                    current_chat = row.chat_pk
+                    lines.append(json.dumps({
+                        "kind": "chat",
+                        "id": row.chat_id,
+                        "title": row.title,
+                        "timestamp": row.chat_timestamp.isoformat()
+                    }))
+                if row.type is not None:
+                    lines.append(json.dumps({
+                        "kind": "message",
+                        "chat_id": row.chat_id,
+                        "id": f"{row.type}_{row.message_timestamp.timestamp()}",  # Match original format
+                        "type": row.type,
+                        "content": row.content,
+                        "url": row.url,
+                        "timestamp": row.message_timestamp.isoformat()
+                    }))
+            if lines:
+                yield "\n".join(lines) + "\n"
+
+def _iter_text(fp):
+    """Yield decoded text from a binary file in fixed-size chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    while True:
+        chunk = fp.read(IMPORT_CHUNK_SIZE)
+        if not chunk:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+def _iter_ndjson(chunks):
+    """Yield one JSON value per non-empty line."""
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        if len(buf) > IMPORT_MAX_RECORD_SIZE:
+            raise ValueError(f"Record exceeds {IMPORT_MAX_RECORD_SIZE} characters")
+    if buf.strip():
+        yield json.loads(buf)
+
+def _iter_json_array(chunks):
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buf = ""
+
+    def fill() -> bool:
+        nonlocal buf
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buf += chunk
+        if len(buf) > IMPORT_MAX_RECORD_SIZE:
+            raise ValueError(f"Record exceeds {IMPORT_MAX_RECORD_SIZE} characters")
+        return True
+
+    def next_char():
+        nonlocal buf
+        while True:
+            buf = buf.lstrip()
+            if buf:
+                return buf[0]
+            if not fill():
+                return None
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    buf = buf[1:]
+
+    expect = "first"
+    while True:
+        char = next_char()
+        if char is None:
+            raise ValueError("Unexpected end of JSON array")
+        if expect == "separator":
+            if char not in ",]":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            buf = buf[1:]
+            if char == "]":
+                break
+            expect = "item"
+            continue
+        if char == "]" and expect == "first":
+            buf = buf[1:]
+            break
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError as e:
+            # Only an item cut off by the chunk boundary is worth reading more for
+            if not _is_truncated(e) or not fill():
+                raise
+            continue
+        yield item
+        buf = buf[end:]
+        expect = "separator"
+
+    if next_char() is not None:
+        raise ValueError("Unexpected data after JSON array")
+
+def _is_truncated(error: json.JSONDecodeError) -> bool:
+    # An unterminated string runs to the end of the buffer; any other error
+    # caused by truncation sits within an escape sequence of the end
+    return error.msg.startswith("Unterminated string") or len(error.doc) - error.pos <= 6
+
+def _iter_import_records(fp):
+    """
+    Yield validated ("chat", ImportChat) and ("message", ImportMessage) pairs.
+
+    Accepts the NDJSON written by /history/export as well as the legacy
+    history/chat_history.json format (a JSON array of summaries). Legacy
+    summaries become a chat holding the URL and the summary as messages.
+    """
+    chunks = _iter_text(fp)
+    for first in chunks:
+        if first.strip():
+            break
+    else:
+        return
+    chunks = itertools.chain([first], chunks)
+
+    if first.lstrip().startswith("["):
+        items = _iter_json_array(chunks)
+    else:
+        items = _iter_ndjson(chunks)
+
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("Expected a JSON object per record")
+        kind = item.get("kind")
+        if kind == "chat":
+            yield "chat", models.ImportChat(**item)
+        elif kind == "message":
+            yield "message", models.ImportMessage(**item)
+        elif "summary" in item:
+            timestamp = datetime.fromisoformat(item["timestamp"]) if item.get("timestamp") else datetime.utcnow()
+            chat_id = str(timestamp.timestamp())
+            yield "chat", models.ImportChat(id=chat_id, title=item.get("title"), timestamp=timestamp)
+            yield "message", models.ImportMessage(chat_id=chat_id, type="user", content=item.get("url"), url=item.get("url"), timestamp=timestamp)
+            yield "message", models.ImportMessage(chat_id=chat_id, type="assistant", content=item.get("summary"), timestamp=timestamp)
+        else:
+            raise ValueError(f"Unrecognized record: {str(item)[:100]}")
+
+class _HistoryImporter:
+    """
+    Buffers imported records and writes them with bulk INSERTs.
+
+    Chats the user already has are skipped together with their messages, so
+    re-importing a file is a no-op. A chat_id taken by another account is
+    imported under an ID derived from the user's ID instead, which keeps
+    the mapping stateless across batches. Messages are resolved against the
+    user's chats in the database, so a message whose chat is unknown is an
+    error rather than being dropped.
+    """
+
+    def __init__(self, db: Session, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.chats = {}
+        self.messages = []
+        self.last_chat_id = None
+        # Chats with a higher primary key were created by this import
+        self.max_existing_pk = db.scalar(select(func.max(models_db.Chat.id))) or 0
+        self.chats_imported = 0
+        self.chats_skipped = 0
+        self.messages_imported = 0
+        self.messages_skipped = 0
+
+    def add_chat(self, chat: models.ImportChat):
+        self.last_chat_id = chat.id
+        self.chats[chat.id] = {
+            "user_id": self.user_id,
+            "title": chat.title,
+            "timestamp": chat.timestamp or datetime.utcnow()
+        }
+        self._flush_if_full()
+
+    def add_message(self, message: models.ImportMessage):
+        chat_id = message.chat_id or self.last_chat_id
+        if chat_id is None:
+            raise ValueError("Message record without a chat")
+        self.messages.append((chat_id, {
+            "type": message.type,
+            "content": message.content,
+            "url": message.url,
+            "timestamp": message.timestamp or datetime.utcnow()
+        }))
+        self._flush_if_full()
+
+    def flush(self):
+        if self.chats:
+            self._flush_chats()
+        if self.messages:
+            self._flush_messages()
+
+    def _flush_if_full(self):
+        if len(self.chats) + len(self.messages) >= IMPORT_BATCH_SIZE:
+            self.flush()
+
+    def _flush_chats(self):
+        candidates = list(self.chats) + [_user_chat_id(self.user_id, chat_id) for chat_id in self.chats]
+        owners = dict(self.db.execute(
+            select(models_db.Chat.chat_id, models_db.Chat.user_id).where(models_db.Chat.chat_id.in_(candidates))
+        ).all())
+
+        rows = []
+        for chat_id, row in self.chats.items():
+            user_chat_id = _user_chat_id(self.user_id, chat_id)
+            # An earlier import may have stored the chat under the derived ID,
+            # even if the original ID has been freed since
+            if self.user_id in (owners.get(chat_id), owners.get(user_chat_id)):
+                self.chats_skipped += 1
+                continue
+            if chat_id in owners:
+                chat_id = user_chat_id
+            if chat_id in owners:
+                self.chats_skipped += 1
+            else:
+                rows.append(dict(row, chat_id=chat_id))
+        if rows:
+            self.db.execute(insert(models_db.Chat), rows)
+
+        self.chats_imported += len(rows)
+        self.chats = {}
+
+    def _flush_messages(self):
+        chat_ids = {chat_id for chat_id, _ in self.messages}
+        candidates = list(chat_ids) + [_user_chat_id(self.user_id, chat_id) for chat_id in chat_ids]
+        chat_pks = dict(self.db.execute(
+            select(models_db.Chat.chat_id, models_db.Chat.id).where(
+                models_db.Chat.user_id == self.user_id,
+                models_db.Chat.chat_id.in_(candidates)
+            )
+        ).all())
+
+        rows = []
+        for chat_id, row in self.messages:
+            pk = chat_pks.get(chat_id) or chat_pks.get(_user_chat_id(self.user_id, chat_id))
+            if pk is None:
+                raise ValueError(f"Message references unknown chat {chat_id!r}")
+            if pk <= self.max_existing_pk:
+                self.messages_skipped += 1
+            else:
+                rows.append(dict(row, chat_id=pk))
+        if rows:
+            self.db.execute(insert(models_db.Message), rows)
+
+        self.messages_imported += len(rows)
+        self.messages = []
+
+def _user_chat_id(user_id: int, chat_id: str) -> str:
+    return hashlib.sha1(f"{user_id}:{chat_id}".encode()).hexdigest()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -43,3 +43,15 @@ class Chat(BaseModel):
     title: str
     messages: List[Message]
     timestamp: datetime
+
+class ImportChat(BaseModel):
+    id: str = Field(..., min_length=1, max_length=50)
+    title: str = Field(..., max_length=500)
+    timestamp: Optional[datetime] = None
+
+class ImportMessage(BaseModel):
+    chat_id: Optional[str] = Field(None, min_length=1, max_length=50)
+    type: Literal['user', 'assistant']
+    content: str
+    url: Optional[str] = Field(None, max_length=1000)
+    timestamp: Optional[datetime] = None
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite database before database.py is imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import auth
+import database
+import history_router
+import models_db
+
+@pytest.fixture
+def db():
+    models_db.Base.metadata.create_all(bind=database.engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        models_db.Base.metadata.drop_all(bind=database.engine)
+
+@pytest.fixture
+def users(db):
+    for name in ("alice", "bob"):
+        db.add(models_db.User(name=name, email=f"{name}@example.com", password="x"))
+    db.commit()
+    return ["alice@example.com", "bob@example.com"]
+
+@pytest.fixture
+def client(users):
+    """Client for the history routes; set client.current["email"] to switch user."""
+    app = FastAPI()
+    app.include_router(history_router.router, prefix="/api")
+
+    current = {"email": users[0]}
+    app.dependency_overrides[auth.get_email_from_token] = lambda: current["email"]
+
+    test_client = TestClient(app)
+    test_client.current = current
+    return test_client
@@ -0,0 +1,212 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import history_router
+import models_db
+
+LEGACY_HISTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "history", "chat_history.json")
+
+def add_chat(db, email, chat_id, messages=2):
+    user = db.query(models_db.User).filter(models_db.User.email == email).first()
+    chat = models_db.Chat(user_id=user.id, chat_id=chat_id, title=f"Title {chat_id}", timestamp=datetime(2025, 1, 1))
+    db.add(chat)
+    db.flush()
+    for i in range(messages):
+        db.add(models_db.Message(
+            chat_id=chat.id,
+            type="user" if i % 2 == 0 else "assistant",
+            content=f"{chat_id} message {i}",
+            url="https://example.com" if i % 2 == 0 else None,
+            timestamp=datetime(2025, 1, 1, 0, 0, i)
+        ))
+    db.commit()
+
+def import_file(client, content):
+    if isinstance(content, str):
+        content = content.encode()
+    return client.post("/api/history/import", files={"file": ("history", content)})
+
+def export_lines(client):
+    response = client.get("/api/history/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def clear_history(db):
+    db.query(models_db.Message).delete()
+    db.query(models_db.Chat).delete()
+    db.commit()
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(history_router, "EXPORT_BATCH_SIZE", 3)
+    monkeypatch.setattr(history_router, "IMPORT_BATCH_SIZE", 4)
+    monkeypatch.setattr(history_router, "IMPORT_CHUNK_SIZE", 7)
+
+def test_export_writes_chat_then_its_messages(client, db):
+    add_chat(db, "alice@example.com", "c1", messages=2)
+    add_chat(db, "alice@example.com", "c2", messages=0)
+    add_chat(db, "bob@example.com", "b1")
+
+    lines = export_lines(client)
+
+    assert [(line["kind"], line.get("chat_id", line.get("id"))) for line in lines] == [
+        ("chat", "c1"), ("message", "c1"), ("message", "c1"), ("chat", "c2")
+    ]
+    assert lines[1]["content"] == "c1 message 0"
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_export_import_round_trip(client, db, request, batched):
+    if batched:
+        request.getfixturevalue("small_batches")
+    for i in range(5):
+        add_chat(db, "alice@example.com", f"c{i}", messages=3)
+    exported = export_lines(client)
+
+    clear_history(db)
+    response = import_file(client, "\n".join(json.dumps(line) for line in exported))
+
+    assert response.status_code == 200, response.json()
+    assert response.json()["chats_imported"] == 5
+    assert response.json()["messages_imported"] == 15
+    assert export_lines(client) == exported
+
+def test_import_messages_after_all_chats(client, db, small_batches):
+    chats = [{"kind": "chat", "id": f"c{i}", "title": "t"} for i in range(10)]
+    messages = [{"kind": "message", "chat_id": f"c{i}", "type": "user", "content": "x"} for i in range(10)]
+
+    response = import_file(client, "\n".join(json.dumps(record) for record in chats + messages))
+
+    assert response.status_code == 200, response.json()
+    assert response.json()["messages_imported"] == 10
+
+def test_import_legacy_history(client, db, small_batches):
+    with open(LEGACY_HISTORY, "rb") as f:
+        legacy = json.load(f)
+        f.seek(0)
+        response = import_file(client, f.read())
+
+    assert response.status_code == 200, response.json()
+    assert response.json()["chats_imported"] == len(legacy)
+    assert response.json()["messages_imported"] == 2 * len(legacy)
+
+    lines = export_lines(client)
+    summaries = [line["content"] for line in lines if line.get("type") == "assistant"]
+    assert sorted(summaries) == sorted(item["summary"] for item in legacy)
+
+def test_reimport_is_idempotent(client, db, small_batches):
+    add_chat(db, "alice@example.com", "c1", messages=3)
+    exported = "\n".join(json.dumps(line) for line in export_lines(client))
+
+    response = import_file(client, exported)
+
+    assert response.status_code == 200
+    assert response.json()["chats_imported"] == 0
+    assert response.json()["chats_skipped"] == 1
+    assert response.json()["messages_skipped"] == 3
+    assert len(export_lines(client)) == 4
+
+def test_import_does_not_reveal_other_users_chats(client, db):
+    add_chat(db, "alice@example.com", "c1", messages=2)
+    exported = "\n".join(json.dumps(line) for line in export_lines(client))
+
+    client.current["email"] = "bob@example.com"
+    response = import_file(client, exported)
+
+    assert response.status_code == 200
+    assert response.json()["chats_imported"] == 1
+    assert response.json()["chats_skipped"] == 0
+    assert response.json()["messages_imported"] == 2
+    assert [line["kind"] for line in export_lines(client)] == ["chat", "message", "message"]
+
+    # Importing the same file again is still a no-op for the second user
+    assert import_file(client, exported).json()["chats_skipped"] == 1
+
+def test_reimport_after_original_owner_deletes_chat(client, db):
+    add_chat(db, "alice@example.com", "c1", messages=2)
+    exported = "\n".join(json.dumps(line) for line in export_lines(client))
+
+    client.current["email"] = "bob@example.com"
+    assert import_file(client, exported).json()["chats_imported"] == 1
+
+    client.current["email"] = "alice@example.com"
+    assert client.delete("/api/summary/c1").status_code == 200
+
+    client.current["email"] = "bob@example.com"
+    response = import_file(client, exported)
+
+    assert response.status_code == 200
+    assert response.json()["chats_imported"] == 0
+    assert response.json()["chats_skipped"] == 1
+    assert response.json()["messages_imported"] == 0
+    assert [line["kind"] for line in export_lines(client)] == ["chat", "message", "message"]
+
+@pytest.mark.parametrize("content", [
+    '{"kind": "chat", "id": "c1", "title": null}',
+    '{"kind": "chat", "id": "' + "x" * 51 + '", "title": "t"}',
+    '{"kind": "chat", "id": "c1", "title": "' + "x" * 501 + '"}',
+    '{"kind": "chat", "id": "c1", "title": "t"}\n{"kind": "message", "type": "system", "content": "x"}',
+    '{"kind": "chat", "id": "c1", "title": "t"}\n{"kind": "message", "type": "user", "content": null}',
+    '{"kind": "message", "type": "user", "content": "x"}',
+    '{"kind": "message", "chat_id": "missing", "type": "user", "content": "x"}',
+    '{"kind": "chat", "id": "c1", "title": "t", "timestamp": "yesterday"}',
+    '{"kind": "chat"',
+    '{"unknown": 1}',
+    '[{"id": "u", "url": "u", "title": "t", "summary": "s"} {}]',
+    '[,]',
+    '[{"id": "u", "url": "u", "title": "t", "summary": "s"},]',
+    '[{"id": "u", "url": "u", "title": "t", "summary": "s"}] trailing',
+    '[{"id": "u", "url": "u", "title": "t", "summary": "s"}',
+    '[1]',
+    pytest.param("[" * 200000, id="deeply-nested-array"),
+    pytest.param('{"kind": "chat", "id": "c1", "title": ' + "[" * 200000 + "}", id="deeply-nested-ndjson"),
+])
+def test_malformed_import_is_rejected(client, db, small_batches, content):
+    response = import_file(client, content)
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid import file")
+    assert db.query(models_db.Chat).count() == 0
+
+def test_malformed_legacy_item_fails_without_reading_rest(client, monkeypatch):
+    read = []
+    original = history_router._iter_text
+
+    def counting_iter_text(fp):
+        for text in original(fp):
+            read.append(len(text))
+            yield text
+
+    monkeypatch.setattr(history_router, "_iter_text", counting_iter_text)
+    item = json.dumps({"id": "u", "url": "u", "title": "t", "summary": "s"})
+    content = '[{"id": nope}, ' + ", ".join([item] * 20000) + "]"
+
+    response = import_file(client, content)
+
+    assert response.status_code == 400
+    assert sum(read) <= 2 * history_router.IMPORT_CHUNK_SIZE
+
+def test_oversized_record_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(history_router, "IMPORT_MAX_RECORD_SIZE", 100)
+
+    response = import_file(client, '[{"summary": "' + "x" * 1000 + '"}]')
+
+    assert response.status_code == 400
+    assert "exceeds" in response.json()["detail"]
+
+def test_import_empty_file(client):
+    response = import_file(client, "  \n")
+
+    assert response.status_code == 200
+    assert response.json()["chats_imported"] == 0
+
+def test_import_splits_utf8_across_chunks(client, small_batches):
+    content = json.dumps([{"id": "u", "timestamp": "2025-07-07T23:12:03", "url": "u", "title": "AI—the good", "summary": "ünïcödé"}], ensure_ascii=False)
+
+    response = import_file(client, content)
+
+    assert response.status_code == 200, response.json()
+    assert [line["title"] for line in export_lines(client) if line["kind"] == "chat"] == ["AI—the good"]